@@ -6,15 +6,30 @@ then compares against the CSV files row-by-row.
 """
 
 import csv
+import hashlib
 import json
 import io
+import operator
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple
+
 import requests
 import pytest
 
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
 BACKUP_DIR = os.environ.get("BACKUP_DIR", os.path.join(os.path.dirname(__file__), "db-backup-22472800037"))
+# Fetched rows are cached on disk between runs; set REFRESH_CACHE=1 to ignore
+# existing entries and re-fetch everything from the live database.
+CACHE_DIR = os.environ.get("SUPABASE_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".supabase_cache"))
+CACHE_TTL = 3600  # seconds
+SPEC_CACHE_TTL = 86400  # seconds; the table list changes only with migrations
+REFRESH_CACHE = os.environ.get("REFRESH_CACHE") == "1"
 
 HEADERS = {
     "apikey": SUPABASE_KEY,
@@ -22,245 +37,554 @@ HEADERS = {
     "Content-Type": "application/json",
 }
 
+# One pooled session for every REST call so TCP/TLS connections are reused.
+# Table and page fetches run in thread pools; size the pool for them and block
+# when it is exhausted rather than opening throwaway connections.
+MAX_CONNECTIONS = 16
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_CONNECTIONS, pool_block=True))
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_CONNECTIONS, pool_block=True))
+
+# Queries fetched up front by the backup_db fixture, keyed by the name tests
+# look them up with: (table, select, order). Every order ends in the primary
+# key so it is total: concurrent Range pages then never overlap or skip rows.
+# The leading columns match each test's sort keys where those are columns of
+# the table itself (embedded names like people(name) cannot lead).
+TABLE_QUERIES = {
+    "people": ("people", "name,association", "name.asc,id.asc"),
+    "calendar_entries": ("calendar_entries", "date,status,note,people(name,association)", "date.asc,id.asc"),
+    "shifts": ("shifts", "date,start_time,end_time,note,mission_types(name)", "date.asc,start_time.asc,id.asc"),
+    "shift_assignments": (
+        "shift_assignments",
+        "role,is_auto,shifts(date,mission_types(name)),people(name)",
+        "created_at.asc,id.asc",
+    ),
+    "roster_config": ("roster_config", "key,value", "key.asc,id.asc"),
+    "organizations": ("organizations", "name,created_at", "name.asc,id.asc"),
+    "mission_types": (
+        "mission_types",
+        "name,display_name,color,default_hours,min_people,required_roles,sort_order",
+        "name.asc,id.asc",
+    ),
+    "calendar_config": ("calendar_config", "key,value", "key.asc,id.asc"),
+    "organization_members": ("organization_members", "user_id,role", "user_id.asc,id.asc"),
+    "profiles": ("profiles", "id,email,full_name,avatar_url,created_at,updated_at", "email.asc,id.asc"),
+}
 
-def supabase_get(table, select="*", params=None, order=None):
-    """Query Supabase REST API with pagination (matching backup script's fetchAll)."""
+# Queries requested as text/csv and returned as tuples in select order. Only
+# flat text columns qualify: PostgREST's CSV renders embedded resources and
+# jsonb as JSON text and timestamps in Postgres format, which would not match
+# the JSON-derived values the backup script writes. Its rows are Postgres
+# composite text rather than true CSV, so backslashes inside quoted fields
+# come back doubled; page_rows undoes that.
+CSV_QUERIES = {"people"}
+
+
+PAGE_SIZE = 1000
+PAGE_WORKERS = 8
+# Values per in.() filter: 100 UUIDs keep the URL near 4 KB, well under the
+# ~8 KB limit where PostgREST/proxies start answering 414.
+IN_BATCH_SIZE = 100
+
+
+def parse_content_range(header):
+    """Return the total from a PostgREST Content-Range header ('0-999/1234'), or None if unknown."""
+    total = (header or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def fetch_page(url, params, start, count=False, as_csv=False):
+    """Fetch one PAGE_SIZE page starting at row `start` using the Range header."""
+    headers = {"Range-Unit": "items", "Range": f"{start}-{start + PAGE_SIZE - 1}"}
+    if as_csv:
+        headers["Accept"] = "text/csv"
+    if count:
+        headers["Prefer"] = "count=exact"
+    resp = SESSION.get(url, headers=headers, params=params, timeout=30)
+    resp.raise_for_status()
+    return resp
+
+
+def page_rows(resp, as_csv=False):
+    """Rows of one page: parsed JSON objects, or stripped CSV tuples without the header line."""
+    if not as_csv:
+        return resp.json()
+    # Decode explicitly: text/csv without a charset makes requests fall back to
+    # ISO-8859-1, which would garble Hebrew names.
+    reader = csv.reader(io.StringIO(resp.content.decode("utf-8")))
+    next(reader, None)
+    # Composite text output doubles every backslash (and always quotes fields
+    # containing one), so halving them restores the stored value.
+    return [tuple(field.replace("\\\\", "\\").strip() for field in row) for row in reader]
+
+
+def cache_path(*key):
+    """Path of the cache file for a JSON-serialisable key."""
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def cache_load(path):
+    """Return the cached value at `path`, or None if missing, expired or REFRESH_CACHE is set."""
+    if REFRESH_CACHE:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry["expires"] < time.time():
+        return None
+    return entry["value"]
+
+
+def cache_ttl(cache_control, ttl):
+    """`ttl` limited by a response's Cache-Control: 0 for no-store/no-cache, else capped at max-age."""
+    for directive in (cache_control or "").lower().split(","):
+        directive = directive.strip()
+        if directive in ("no-store", "no-cache"):
+            return 0
+        if directive.startswith("max-age="):
+            try:
+                ttl = min(ttl, int(directive[len("max-age="):]))
+            except ValueError:
+                pass
+    return ttl
+
+
+def cache_store(path, value, cache_control=None, ttl=CACHE_TTL):
+    """Write a value to the cache for `ttl` seconds, or less if the response's Cache-Control says so."""
+    ttl = cache_ttl(cache_control, ttl)
+    if ttl <= 0:
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a private temp file and rename, so concurrent writers (threads
+    # or pytest-xdist workers) never leave a half-written entry behind.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"expires": time.time() + ttl, "value": value}, f)
+    os.replace(tmp, path)
+
+
+def fetch_all_pages(url, params, as_csv=False):
+    """Fetch every page of a query; returns (rows, first_response).
+
+    The first page is requested with Prefer: count=exact; once the total is
+    known from Content-Range, the remaining pages are fetched concurrently
+    and concatenated in offset order.
+    """
+    first = fetch_page(url, params, 0, count=True, as_csv=as_csv)
+    all_rows = page_rows(first, as_csv)
+    total = parse_content_range(first.headers.get("Content-Range"))
+
+    if total is None:
+        # No count reported: walk the pages one at a time until a short one.
+        data = all_rows
+        start = PAGE_SIZE
+        while len(data) == PAGE_SIZE:
+            data = page_rows(fetch_page(url, params, start, as_csv=as_csv), as_csv)
+            all_rows.extend(data)
+            start += PAGE_SIZE
+        return all_rows, first
+
+    starts = range(PAGE_SIZE, total, PAGE_SIZE)
+    if starts:
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            # map() yields in submission order, so pages stay in offset order.
+            pages = executor.map(lambda start: fetch_page(url, params, start, as_csv=as_csv), starts)
+            for resp in pages:
+                all_rows.extend(page_rows(resp, as_csv))
+    return all_rows, first
+
+
+def supabase_get(table, select="*", params=None, order=None, as_csv=False):
+    """Query Supabase REST API with pagination (matching backup script's fetchAll).
+
+    With as_csv=True the response is requested as text/csv and rows come
+    back as tuples of stripped strings in `select` order, skipping JSON
+    decoding and per-row dicts.
+
+    Results are served from the on-disk cache in CACHE_DIR when a fresh
+    entry exists for the same table and query parameters.
+    """
     all_params = {"select": select}
     if order:
         all_params["order"] = order
     if params:
         all_params.update(params)
 
-    PAGE_SIZE = 1000
-    all_rows = []
-    offset = 0
-    while True:
-        p = dict(all_params)
-        p["offset"] = str(offset)
-        p["limit"] = str(PAGE_SIZE)
-        resp = requests.get(
+    path = cache_path(SUPABASE_URL, table, all_params, as_csv)
+    rows = cache_load(path)
+    if rows is None:
+        rows, first = fetch_all_pages(f"{SUPABASE_URL}/rest/v1/{table}", all_params, as_csv)
+        cache_store(path, rows, first.headers.get("Cache-Control"))
+    elif as_csv:
+        rows = [tuple(row) for row in rows]  # JSON round-trips tuples as lists
+    return rows
+
+
+def supabase_get_in(table, select, column, values):
+    """Fetch rows whose `column` is in `values`, splitting the in.() filter into batches fetched concurrently."""
+    values = list(dict.fromkeys(values))  # dedupe, keep order
+    batches = [values[i:i + IN_BATCH_SIZE] for i in range(0, len(values), IN_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+        results = executor.map(
+            lambda batch: supabase_get(table, select, params={column: f"in.({','.join(batch)})"}),
+            batches,
+        )
+        return [row for rows in results for row in rows]
+
+
+def supabase_count(table, params=None):
+    """Row count of a table via a HEAD request with Prefer: count=exact (no rows downloaded)."""
+    path = cache_path(SUPABASE_URL, "count", table, params)
+    count = cache_load(path)
+    if count is None:
+        resp = SESSION.head(
             f"{SUPABASE_URL}/rest/v1/{table}",
-            headers={**HEADERS, "Prefer": "return=representation"},
-            params=p,
+            headers={"Prefer": "count=exact"},
+            params=params,
+            timeout=30,
+        )
+        resp.raise_for_status()
+        count = parse_content_range(resp.headers.get("Content-Range"))
+        assert count is not None, f"No row count in Content-Range for {table}: {resp.headers.get('Content-Range')!r}"
+        cache_store(path, count, resp.headers.get("Cache-Control"))
+    return count
+
+
+def supabase_tables():
+    """Table names exposed by PostgREST, read from its OpenAPI spec.
+
+    Only the derived name list is cached (for SPEC_CACHE_TTL), so repeat
+    runs skip the multi-MB spec download entirely.
+    """
+    path = cache_path(SUPABASE_URL, "openapi-tables")
+    tables = cache_load(path)
+    if tables is None:
+        resp = SESSION.get(
+            f"{SUPABASE_URL}/rest/v1/",
+            headers={"Accept": "application/openapi+json"},
+            timeout=30,
         )
         resp.raise_for_status()
-        data = resp.json()
-        if not data:
-            break
-        all_rows.extend(data)
-        if len(data) < PAGE_SIZE:
-            break
-        offset += PAGE_SIZE
-    return all_rows
-
-
-def read_backup_csv(filename):
-    """Read a backup CSV file and return list of dicts."""
+        tables = sorted(
+            p.lstrip("/")
+            for p in resp.json().get("paths", {})
+            if p != "/" and not p.startswith("/rpc/")
+        )
+        cache_store(path, tables, resp.headers.get("Cache-Control"), ttl=SPEC_CACHE_TTL)
+    return set(tables)
+
+
+def fetch_query(name):
+    """Rows for one TABLE_QUERIES entry (tuples for CSV_QUERIES, dicts otherwise)."""
+    table, select, order = TABLE_QUERIES[name]
+    return supabase_get(table, select, order=order, as_csv=name in CSV_QUERIES)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def http_session():
+    """Close the shared HTTP session's pooled connections when the test session ends."""
+    yield SESSION
+    SESSION.close()
+
+
+class TableRows(dict):
+    """Rows keyed by TABLE_QUERIES name.
+
+    Values may be futures from a parallel prefetch; each is resolved on first
+    lookup, so a failing query only errors the tests that use that table.
+    Tables that were not prefetched are fetched on first lookup.
+    """
+
+    def __getitem__(self, name):
+        value = super().__getitem__(name)
+        if isinstance(value, Future):
+            value = self[name] = value.result()
+        return value
+
+    def __missing__(self, name):
+        rows = self[name] = fetch_query(name)
+        return rows
+
+
+@pytest.fixture(scope="session")
+def backup_db():
+    """All tables from TABLE_QUERIES, fetched once per session.
+
+    A single process prefetches every table in parallel. A pytest-xdist
+    worker only runs some of the classes, so it fetches tables lazily.
+    """
+    tables = TableRows()
+    if "PYTEST_XDIST_WORKER" in os.environ:
+        yield tables
+        return
+    with ThreadPoolExecutor(max_workers=len(TABLE_QUERIES)) as executor:
+        tables.update({name: executor.submit(fetch_query, name) for name in TABLE_QUERIES})
+        yield tables
+
+
+@lru_cache(maxsize=None)
+def load_backup_csv(filename, row_type):
+    """Parse a backup CSV once per process into an immutable tuple of `row_type` rows.
+
+    Parsing, column projection and stripping happen in a single pass, so each
+    row is allocated once, directly as its NamedTuple.
+    """
     filepath = os.path.join(BACKUP_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    with open(filepath, "r", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        col_indices = [header.index(c) for c in row_type._fields]
+        # csv.reader always yields strings, so project and strip with
+        # C-level itemgetter/str.strip instead of calling normalize per field.
+        pick = operator.itemgetter(*col_indices)  # every row type has 2+ fields, so this returns a tuple
+        make = row_type._make
+        return tuple(make(map(str.strip, pick(row))) for row in reader)
 
 
 def normalize(val):
     """Normalize a value for comparison: strip whitespace, treat None/empty as ''."""
+    # Most values are already strings; skip the str() call for them.
+    if type(val) is str:
+        return val.strip()
     if val is None:
         return ""
     return str(val).strip()
 
 
-def sort_rows(rows, keys):
-    """Sort rows by given keys for stable comparison."""
-    return sorted(rows, key=lambda r: tuple(normalize(r.get(k, "")) for k in keys))
+def js_json(val):
+    """Serialize like JSON.stringify in backup-to-csv.js: no spaces, non-ASCII kept as-is."""
+    return json.dumps(val, separators=(",", ":"), ensure_ascii=False)
+
+
+def parse_json(val):
+    """Parse a JSON string; returns None if `val` is not valid JSON."""
+    try:
+        return json.loads(val)
+    except (ValueError, TypeError):
+        return None
+
+
+def sort_rows(rows, row_type, keys):
+    """Sort `row_type` rows by the given field names for stable comparison."""
+    # Fields are normalized when rows are built, so the key is a plain C-level
+    # itemgetter; sorted() evaluates it once per row, not per comparison.
+    return sorted(rows, key=operator.itemgetter(*(row_type._fields.index(k) for k in keys)))
+
+
+def diff_rows(db_rows, csv_rows, row_type, keys, max_report=20):
+    """Multiset-compare DB and CSV `row_type` rows; return mismatch messages, at most `max_report` per side.
+
+    Rows present on only one side are reported in `keys` order, so a changed
+    row shows up as a neighbouring pair of "Only in DB" / "Only in CSV" lines.
+    """
+    db_counts = Counter(db_rows)
+    csv_counts = Counter(csv_rows)
+    if db_counts == csv_counts:
+        return []
+    mismatches = []
+    for side, extra in (("DB", db_counts - csv_counts), ("CSV", csv_counts - db_counts)):
+        rows = sort_rows(list(extra.elements()), row_type, keys)
+        for r in rows[:max_report]:
+            mismatches.append(f"Only in {side}: {r}")
+        if len(rows) > max_report:
+            mismatches.append(f"... and {len(rows) - max_report} more rows only in {side}")
+    return mismatches
+
+
+class ConfigEntry(NamedTuple):
+    key: str
+    value: str
+
+
+def config_entries(rows):
+    """ConfigEntry rows from key/value DB rows, serializing non-string values like the backup script."""
+    return [
+        ConfigEntry(r["key"], r["value"] if isinstance(r.get("value"), str) else js_json(r.get("value")))
+        for r in rows
+    ]
+
+
+def diff_config(db_entries, csv_entries):
+    """Compare key/value config rows by key; return mismatch messages in key order.
+
+    Each value is parsed as JSON once. When both sides parse, they are
+    compared structurally (key order ignored); otherwise as stripped text.
+    """
+    db_map = dict(db_entries)
+    csv_map = dict(csv_entries)
+    mismatches = []
+    for key in sorted(db_map.keys() | csv_map.keys()):
+        if key not in db_map:
+            mismatches.append(f"Key '{key}': in CSV but not in DB")
+            continue
+        if key not in csv_map:
+            mismatches.append(f"Key '{key}': in DB but not in CSV")
+            continue
+        db_val, csv_val = db_map[key], csv_map[key]
+        db_parsed, csv_parsed = parse_json(db_val), parse_json(csv_val)
+        if db_parsed is not None and csv_parsed is not None:
+            if db_parsed != csv_parsed:
+                mismatches.append(
+                    f"Key '{key}': structural diff\n  DB:  {js_json(db_parsed)[:200]}\n  CSV: {js_json(csv_parsed)[:200]}"
+                )
+        elif normalize(db_val) != normalize(csv_val):
+            mismatches.append(f"Key '{key}': DB='{db_val[:100]}' != CSV='{csv_val[:100]}'")
+    return mismatches
 
 
 # ---------------------------------------------------------------------------
 # Test: People
 # ---------------------------------------------------------------------------
+class Person(NamedTuple):
+    name: str
+    association: str
+
+
 class TestPeople:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        self.db_data = supabase_get("people", "name,association", order="name.asc")
-        self.csv_data = read_backup_csv("people.csv")
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        # Fetched as text/csv (see CSV_QUERIES): rows are already (name, association) tuples
+        cls.db_data = list(map(Person._make, backup_db["people"]))
+        cls.csv_data = load_backup_csv("people.csv", Person)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("people")
+        csv_count = len(load_backup_csv("people.csv", Person))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        db_rows = sort_rows(
-            [{"name": r["name"], "association": normalize(r.get("association"))} for r in self.db_data],
-            ["name"],
-        )
-        csv_rows = sort_rows(
-            [{"name": normalize(r["name"]), "association": normalize(r.get("association"))} for r in self.csv_data],
-            ["name"],
-        )
-        mismatches = []
-        # Check all DB rows present in CSV
-        db_names = {r["name"] for r in db_rows}
-        csv_names = {r["name"] for r in csv_rows}
-        only_db = db_names - csv_names
-        only_csv = csv_names - db_names
-        if only_db:
-            mismatches.append(f"In DB but not CSV: {only_db}")
-        if only_csv:
-            mismatches.append(f"In CSV but not DB: {only_csv}")
-        # Compare matching rows
-        db_map = {r["name"]: r for r in db_rows}
-        csv_map = {r["name"]: r for r in csv_rows}
-        for name in db_names & csv_names:
-            if db_map[name] != csv_map[name]:
-                mismatches.append(f"Diff for '{name}': DB={db_map[name]}, CSV={csv_map[name]}")
+        mismatches = diff_rows(self.db_data, self.csv_data, Person, ["name"])
         assert not mismatches, "People mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Calendar Entries
 # ---------------------------------------------------------------------------
+class CalendarEntry(NamedTuple):
+    name: str
+    date: str
+    status: str
+    note: str
+    association: str
+
+
 class TestCalendarEntries:
-    @pytest.fixture(autouse=True)
-    def setup(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
         # Replicate the backup script's join: calendar_entries with people(name, association)
-        raw = supabase_get(
-            "calendar_entries",
-            "date,status,note,people(name,association)",
-            order="date.asc",
-        )
-        self.db_data = []
-        for e in raw:
+        cls.db_data = []
+        for e in backup_db["calendar_entries"]:
             p = e.get("people") or {}
-            self.db_data.append({
-                "name": normalize(p.get("name")),
-                "date": normalize(e.get("date")),
-                "status": normalize(e.get("status")),
-                "note": normalize(e.get("note")),
-                "association": normalize(p.get("association")),
-            })
-        self.csv_data = read_backup_csv("calendar_entries.csv")
+            cls.db_data.append(CalendarEntry(
+                normalize(p.get("name")),
+                normalize(e.get("date")),
+                normalize(e.get("status")),
+                normalize(e.get("note")),
+                normalize(p.get("association")),
+            ))
+        cls.csv_data = load_backup_csv("calendar_entries.csv", CalendarEntry)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("calendar_entries")
+        csv_count = len(load_backup_csv("calendar_entries.csv", CalendarEntry))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        sort_keys = ["name", "date"]
-        db_rows = sort_rows(self.db_data, sort_keys)
-        csv_rows = sort_rows(
-            [{k: normalize(v) for k, v in r.items()} for r in self.csv_data],
-            sort_keys,
-        )
-        mismatches = []
-        max_report = 20  # cap output
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
-                if len(mismatches) >= max_report:
-                    mismatches.append(f"... (showing first {max_report} of potentially more)")
-                    break
-        # Check for extra rows
-        if len(db_rows) > len(csv_rows):
-            for r in db_rows[len(csv_rows):len(csv_rows)+5]:
-                mismatches.append(f"Extra DB row: {r}")
-        elif len(csv_rows) > len(db_rows):
-            for r in csv_rows[len(db_rows):len(db_rows)+5]:
-                mismatches.append(f"Extra CSV row: {r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, CalendarEntry, ["name", "date"])
         assert not mismatches, "Calendar entries mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Shifts
 # ---------------------------------------------------------------------------
+class Shift(NamedTuple):
+    date: str
+    mission_type: str
+    start_time: str
+    end_time: str
+    note: str
+
+
 class TestShifts:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        raw = supabase_get(
-            "shifts",
-            "date,start_time,end_time,note,mission_types(name)",
-            order="date.asc",
-        )
-        self.db_data = []
-        for s in raw:
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = []
+        for s in backup_db["shifts"]:
             mt = s.get("mission_types") or {}
-            self.db_data.append({
-                "date": normalize(s.get("date")),
-                "mission_type": normalize(mt.get("name")),
-                "start_time": normalize(s.get("start_time")),
-                "end_time": normalize(s.get("end_time")),
-                "note": normalize(s.get("note")),
-            })
-        self.csv_data = read_backup_csv("shifts.csv")
+            cls.db_data.append(Shift(
+                normalize(s.get("date")),
+                normalize(mt.get("name")),
+                normalize(s.get("start_time")),
+                normalize(s.get("end_time")),
+                normalize(s.get("note")),
+            ))
+        cls.csv_data = load_backup_csv("shifts.csv", Shift)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("shifts")
+        csv_count = len(load_backup_csv("shifts.csv", Shift))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        sort_keys = ["date", "mission_type", "start_time"]
-        db_rows = sort_rows(self.db_data, sort_keys)
-        csv_rows = sort_rows(
-            [{k: normalize(v) for k, v in r.items()} for r in self.csv_data],
-            sort_keys,
-        )
-        mismatches = []
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, Shift, ["date", "mission_type", "start_time"])
         assert not mismatches, "Shifts mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Shift Assignments
 # ---------------------------------------------------------------------------
+class ShiftAssignment(NamedTuple):
+    shift_date: str
+    mission_type: str
+    person_name: str
+    role: str
+    is_manual: str
+
+
 class TestShiftAssignments:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        raw = supabase_get(
-            "shift_assignments",
-            "role,is_auto,shifts(date,mission_types(name)),people(name)",
-            order="created_at.asc",
-        )
-        self.db_data = []
-        for a in raw:
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = []
+        for a in backup_db["shift_assignments"]:
             shift = a.get("shifts") or {}
             mt = shift.get("mission_types") or {}
             p = a.get("people") or {}
-            self.db_data.append({
-                "shift_date": normalize(shift.get("date")),
-                "mission_type": normalize(mt.get("name")),
-                "person_name": normalize(p.get("name")),
-                "role": normalize(a.get("role")),
-                "is_manual": "FALSE" if a.get("is_auto") else "TRUE",
-            })
-        self.csv_data = read_backup_csv("shift_assignments.csv")
+            cls.db_data.append(ShiftAssignment(
+                normalize(shift.get("date")),
+                normalize(mt.get("name")),
+                normalize(p.get("name")),
+                normalize(a.get("role")),
+                "FALSE" if a.get("is_auto") else "TRUE",
+            ))
+        cls.csv_data = load_backup_csv("shift_assignments.csv", ShiftAssignment)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("shift_assignments")
+        csv_count = len(load_backup_csv("shift_assignments.csv", ShiftAssignment))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        sort_keys = ["shift_date", "mission_type", "person_name"]
-        db_rows = sort_rows(self.db_data, sort_keys)
-        csv_rows = sort_rows(
-            [{k: normalize(v) for k, v in r.items()} for r in self.csv_data],
-            sort_keys,
-        )
-        mismatches = []
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, ShiftAssignment, ["shift_date", "mission_type", "person_name"])
         assert not mismatches, "Shift assignments mismatches:\n" + "\n".join(mismatches)
 
 
@@ -268,130 +592,96 @@ class TestShiftAssignments:
 # Test: Roster Config
 # ---------------------------------------------------------------------------
 class TestRosterConfig:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        raw = supabase_get("roster_config", "key,value")
-        self.db_data = []
-        for r in raw:
-            val = r.get("value")
-            if isinstance(val, str):
-                self.db_data.append({"key": r["key"], "value": val})
-            else:
-                self.db_data.append({"key": r["key"], "value": json.dumps(val)})
-        self.csv_data = read_backup_csv("roster_config.csv")
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = config_entries(backup_db["roster_config"])
+        cls.csv_data = load_backup_csv("roster_config.csv", ConfigEntry)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("roster_config")
+        csv_count = len(load_backup_csv("roster_config.csv", ConfigEntry))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        db_map = {r["key"]: r["value"] for r in self.db_data}
-        csv_map = {r["key"]: r["value"] for r in self.csv_data}
-        mismatches = []
-        all_keys = set(db_map.keys()) | set(csv_map.keys())
-        for key in sorted(all_keys):
-            db_val = db_map.get(key)
-            csv_val = csv_map.get(key)
-            if db_val is None:
-                mismatches.append(f"Key '{key}': in CSV but not in DB")
-                continue
-            if csv_val is None:
-                mismatches.append(f"Key '{key}': in DB but not in CSV")
-                continue
-            # Parse both as JSON for structural comparison (handles key ordering)
-            try:
-                db_parsed = json.loads(db_val)
-                csv_parsed = json.loads(csv_val)
-                if db_parsed != csv_parsed:
-                    mismatches.append(
-                        f"Key '{key}': structural diff\n  DB:  {json.dumps(db_parsed, ensure_ascii=False)[:200]}\n  CSV: {json.dumps(csv_parsed, ensure_ascii=False)[:200]}"
-                    )
-            except (json.JSONDecodeError, TypeError):
-                if normalize(db_val) != normalize(csv_val):
-                    mismatches.append(
-                        f"Key '{key}': DB='{db_val[:100]}' != CSV='{csv_val[:100]}'"
-                    )
+        mismatches = diff_config(self.db_data, self.csv_data)
         assert not mismatches, "Roster config mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Organizations
 # ---------------------------------------------------------------------------
+class Organization(NamedTuple):
+    name: str
+    created_at: str
+
+
 class TestOrganizations:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        self.db_data = supabase_get("organizations", "name,created_at")
-        self.csv_data = read_backup_csv("organizations.csv")
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = [
+            Organization(normalize(r["name"]), normalize(r["created_at"])) for r in backup_db["organizations"]
+        ]
+        cls.csv_data = load_backup_csv("organizations.csv", Organization)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("organizations")
+        csv_count = len(load_backup_csv("organizations.csv", Organization))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        db_rows = sort_rows(
-            [{"name": normalize(r["name"]), "created_at": normalize(r["created_at"])} for r in self.db_data],
-            ["name"],
-        )
-        csv_rows = sort_rows(
-            [{"name": normalize(r["name"]), "created_at": normalize(r["created_at"])} for r in self.csv_data],
-            ["name"],
-        )
-        mismatches = []
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, Organization, ["name"])
         assert not mismatches, "Organizations mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Mission Types
 # ---------------------------------------------------------------------------
+class MissionType(NamedTuple):
+    name: str
+    display_name: str
+    color: str
+    default_hours: str
+    min_people: str
+    required_roles: str
+    sort_order: str
+
+
 class TestMissionTypes:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        raw = supabase_get(
-            "mission_types",
-            "name,display_name,color,default_hours,min_people,required_roles,sort_order",
-            order="sort_order.asc",
-        )
-        self.db_data = []
-        for mt in raw:
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = []
+        for mt in backup_db["mission_types"]:
             rr = mt.get("required_roles")
-            self.db_data.append({
-                "name": normalize(mt.get("name")),
-                "display_name": normalize(mt.get("display_name")),
-                "color": normalize(mt.get("color")),
-                "default_hours": normalize(mt.get("default_hours")),
-                "min_people": normalize(mt.get("min_people")),
-                "required_roles": json.dumps(rr) if isinstance(rr, list) else normalize(rr),
-                "sort_order": normalize(mt.get("sort_order")),
-            })
-        self.csv_data = read_backup_csv("mission_types.csv")
+            cls.db_data.append(MissionType(
+                normalize(mt.get("name")),
+                normalize(mt.get("display_name")),
+                normalize(mt.get("color")),
+                normalize(mt.get("default_hours")),
+                normalize(mt.get("min_people")),
+                js_json(rr) if isinstance(rr, list) else normalize(rr),
+                normalize(mt.get("sort_order")),
+            ))
+        cls.csv_data = load_backup_csv("mission_types.csv", MissionType)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("mission_types")
+        csv_count = len(load_backup_csv("mission_types.csv", MissionType))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        sort_keys = ["name"]
-        db_rows = sort_rows(self.db_data, sort_keys)
-        csv_rows = sort_rows(
-            [{k: normalize(v) for k, v in r.items()} for r in self.csv_data],
-            sort_keys,
-        )
-        mismatches = []
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, MissionType, ["name"])
         assert not mismatches, "Mission types mismatches:\n" + "\n".join(mismatches)
 
 
@@ -399,125 +689,101 @@ class TestMissionTypes:
 # Test: Calendar Config
 # ---------------------------------------------------------------------------
 class TestCalendarConfig:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        raw = supabase_get("calendar_config", "key,value")
-        self.db_data = []
-        for r in raw:
-            val = r.get("value")
-            if isinstance(val, str):
-                self.db_data.append({"key": r["key"], "value": val})
-            else:
-                self.db_data.append({"key": r["key"], "value": json.dumps(val)})
-        self.csv_data = read_backup_csv("calendar_config.csv")
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = config_entries(backup_db["calendar_config"])
+        cls.csv_data = load_backup_csv("calendar_config.csv", ConfigEntry)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("calendar_config")
+        csv_count = len(load_backup_csv("calendar_config.csv", ConfigEntry))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        db_map = {r["key"]: r["value"] for r in self.db_data}
-        csv_map = {r["key"]: r["value"] for r in self.csv_data}
-        mismatches = []
-        for key in set(db_map) | set(csv_map):
-            db_val = db_map.get(key)
-            csv_val = csv_map.get(key)
-            if db_val is None:
-                mismatches.append(f"Key '{key}': in CSV but not in DB")
-            elif csv_val is None:
-                mismatches.append(f"Key '{key}': in DB but not in CSV")
-            elif normalize(db_val) != normalize(csv_val):
-                mismatches.append(f"Key '{key}': DB='{db_val}' != CSV='{csv_val}'")
+        mismatches = diff_config(self.db_data, self.csv_data)
         assert not mismatches, "Calendar config mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Organization Members
 # ---------------------------------------------------------------------------
+class OrganizationMember(NamedTuple):
+    email: str
+    full_name: str
+    role: str
+
+
 class TestOrganizationMembers:
-    @pytest.fixture(autouse=True)
-    def setup(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
         # The backup script queries organization_members + profiles separately
-        members = supabase_get("organization_members", "user_id,role")
+        members = backup_db["organization_members"]
         if not members:
-            self.db_data = []
+            cls.db_data = []
         else:
             user_ids = [m["user_id"] for m in members]
             # Query profiles for these user_ids
-            profiles = supabase_get(
-                "profiles",
-                "id,email,full_name",
-                params={"id": f"in.({','.join(user_ids)})"},
-            )
+            profiles = supabase_get_in("profiles", "id,email,full_name", "id", user_ids)
             profile_map = {p["id"]: p for p in profiles}
-            self.db_data = []
+            cls.db_data = []
             for m in members:
                 prof = profile_map.get(m["user_id"], {})
-                self.db_data.append({
-                    "email": normalize(prof.get("email")),
-                    "full_name": normalize(prof.get("full_name")),
-                    "role": normalize(m.get("role")),
-                })
-        self.csv_data = read_backup_csv("organization_members.csv")
+                cls.db_data.append(OrganizationMember(
+                    normalize(prof.get("email")),
+                    normalize(prof.get("full_name")),
+                    normalize(m.get("role")),
+                ))
+        cls.csv_data = load_backup_csv("organization_members.csv", OrganizationMember)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("organization_members")
+        csv_count = len(load_backup_csv("organization_members.csv", OrganizationMember))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        sort_keys = ["email"]
-        db_rows = sort_rows(self.db_data, sort_keys)
-        csv_rows = sort_rows(
-            [{k: normalize(v) for k, v in r.items()} for r in self.csv_data],
-            sort_keys,
-        )
-        mismatches = []
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, OrganizationMember, ["email"])
         assert not mismatches, "Organization members mismatches:\n" + "\n".join(mismatches)
 
 
 # ---------------------------------------------------------------------------
 # Test: Profiles
 # ---------------------------------------------------------------------------
+class Profile(NamedTuple):
+    id: str
+    email: str
+    full_name: str
+    avatar_url: str
+    created_at: str
+    updated_at: str
+
+
 class TestProfiles:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        self.db_data = supabase_get(
-            "profiles",
-            "id,email,full_name,avatar_url,created_at,updated_at",
-            order="created_at.asc",
-        )
-        self.csv_data = read_backup_csv("profiles.csv")
+    @pytest.fixture(scope="class")
+    @classmethod
+    def setup(cls, backup_db):
+        cls.db_data = [
+            Profile._make(normalize(r.get(k)) for k in Profile._fields) for r in backup_db["profiles"]
+        ]
+        cls.csv_data = load_backup_csv("profiles.csv", Profile)
 
     def test_row_count(self):
-        db_count = len(self.db_data)
-        csv_count = len(self.csv_data)
+        db_count = supabase_count("profiles")
+        csv_count = len(load_backup_csv("profiles.csv", Profile))
         assert db_count == csv_count, (
             f"Row count mismatch: DB={db_count}, CSV={csv_count}"
         )
 
+    @pytest.mark.usefixtures("setup")
     def test_content_match(self):
-        cols = ["id", "email", "full_name", "avatar_url", "created_at", "updated_at"]
-        db_rows = sort_rows(
-            [{k: normalize(r.get(k)) for k in cols} for r in self.db_data],
-            ["email"],
-        )
-        csv_rows = sort_rows(
-            [{k: normalize(r.get(k)) for k in cols} for r in self.csv_data],
-            ["email"],
-        )
-        mismatches = []
-        for i, (db_r, csv_r) in enumerate(zip(db_rows, csv_rows)):
-            if db_r != csv_r:
-                mismatches.append(f"Row {i}: DB={db_r} != CSV={csv_r}")
+        mismatches = diff_rows(self.db_data, self.csv_data, Profile, ["email"])
         assert not mismatches, "Profiles mismatches:\n" + "\n".join(mismatches)
 
 
@@ -527,17 +793,7 @@ class TestProfiles:
 class TestTableCompleteness:
     def test_all_tables_backed_up(self):
         """Verify backup covers every table in the database."""
-        resp = requests.get(
-            f"{SUPABASE_URL}/rest/v1/",
-            headers={**HEADERS, "Accept": "application/openapi+json"},
-        )
-        resp.raise_for_status()
-        spec = resp.json()
-        db_tables = {
-            p.lstrip("/")
-            for p in spec.get("paths", {})
-            if p != "/" and not p.startswith("/rpc/")
-        }
+        db_tables = supabase_tables()
         backup_files = {
             f.replace(".csv", "")
             for f in os.listdir(BACKUP_DIR)